@@ -0,0 +1,85 @@
+"""
+Helpers for building ExtensionCustomAction payloads efficiently
+"""
+import itertools
+import pickle
+import weakref
+from typing import Any, Optional
+from ulauncher.api.shared.action.ExtensionCustomAction import ExtensionCustomAction
+
+# Registry of objects whose methods can be invoked from custom action
+# payloads. Weak references keep it bounded: an entry disappears as soon
+# as the owning object is garbage collected. Keys come from a counter
+# (rather than id()) so a key can never silently point at a different
+# object that happens to reuse the same memory address.
+_CALLABLE_OBJECTS: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_OBJECT_KEYS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_NEXT_OBJECT_KEY = itertools.count()
+
+
+def get_callable_object_key(method: Any) -> int:
+    """
+    Register the object that a bound method belongs to and return a key
+    that can be shipped inside a pickled action payload.
+
+    Registering the same object again returns its existing key, so the
+    registry stays as small as the number of live registered objects no
+    matter how many actions are built per keystroke.
+    """
+    obj = method.__self__
+    key = _OBJECT_KEYS.get(obj)
+    if key is None:
+        key = next(_NEXT_OBJECT_KEY)
+        _OBJECT_KEYS[obj] = key
+        _CALLABLE_OBJECTS[key] = obj
+    return key
+
+
+def get_callable_object(key: int) -> Optional[Any]:
+    """
+    Look up a previously registered object, or None if it is gone
+    """
+    return _CALLABLE_OBJECTS.get(key)
+
+
+def pickle_action_data(data: Any) -> bytes:
+    """
+    Serialize a custom action payload once, up front
+    """
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class PrePickledCustomAction(ExtensionCustomAction):
+    """
+    ExtensionCustomAction that accepts an already-pickled payload.
+
+    Ulauncher pickles the payload of every ExtensionCustomAction when
+    the action is constructed. When many same-shaped payloads are built
+    per keystroke (one per search result item), serializing each payload
+    with `pickle_action_data` and handing over the raw bytes avoids
+    walking the object graph through the default pickle protocol again.
+    """
+
+    def __init__(self, data_bytes: bytes, keep_app_open: bool = False) -> None:
+        super().__init__(None, keep_app_open=keep_app_open)
+        self._data = data_bytes
+
+
+class CallMethodAction(PrePickledCustomAction):
+    """
+    Custom action that calls a method on a live extension-side object.
+
+    Instead of describing what should happen in an ad-hoc payload dict
+    that ItemEnterEventListener has to interpret, the payload names a
+    registered object and one of its methods; the listener resolves the
+    object and calls the method with the given arguments.
+    """
+
+    def __init__(self, method: Any, *args: Any, keep_app_open: bool = False) -> None:
+        payload = {
+            "action": "call_method",
+            "obj_key": get_callable_object_key(method),
+            "method_name": method.__name__,
+            "args": args,
+        }
+        super().__init__(pickle_action_data(payload), keep_app_open=keep_app_open)
@@ -4,8 +4,10 @@ Search KeePassXC password databases and copy passwords to the clipboard.
 import logging
 import os
 import sys
+from collections import deque
+from itertools import islice
 from threading import Timer
-from typing import Optional
+from typing import Optional, Set
 import gi
 from ulauncher.api.client.Extension import Extension
 from ulauncher.api.client.EventListener import EventListener
@@ -24,6 +26,7 @@ from .keepassxc_db import (
     KeepassxcFileNotFoundError,
     KeepassxcCliError,
 )
+from .custom_action_utils import get_callable_object
 from .gtk_passphrase_entry import GtkPassphraseEntryWindow
 from .wmctrl import activate_window_by_class_name, WmctrlNotFoundError
 from . import render
@@ -58,6 +61,12 @@ def current_script_path() -> str:
     return os.path.abspath(os.path.dirname(sys.argv[0]))
 
 
+# Neither the script location nor the icon path change while the
+# extension is running - resolve them once at import time
+_SCRIPT_DIR = current_script_path()
+_PASSPHRASE_WINDOW_ICON = os.path.join(_SCRIPT_DIR, "images/keepassxc-search.svg")
+
+
 class KeepassxcExtension(Extension):
     """ Extension class, coordinates everything """
 
@@ -74,25 +83,68 @@ class KeepassxcExtension(Extension):
         )
         self.active_entry = None
         self.active_entry_search_restore = None
-        self.recent_active_entries = []
+        self.recent_active_entries: deque = deque()
+        self._recent_set: Set[str] = set()
+        # Memoized preference values - they are recomputed from the
+        # preferences dict only after a PreferencesUpdateEvent
+        self._db_path_cache: Optional[str] = None
+        self._max_results_cache: Optional[int] = None
+        self._inactivity_cache: Optional[int] = None
 
     def get_db_path(self) -> str:
         """
         Normalized and expanded path to the database file
         """
-        return os.path.expanduser(self.preferences["database-path"])
+        if self._db_path_cache is None:
+            self._db_path_cache = os.path.expanduser(
+                self.preferences["database-path"]
+            )
+        return self._db_path_cache
 
     def get_max_result_items(self) -> int:
         """
         Maximum number of search results to show on screen
         """
-        return int(self.preferences["max-results"])
+        if self._max_results_cache is None:
+            self._max_results_cache = int(self.preferences["max-results"])
+        return self._max_results_cache
 
     def get_inactivity_lock_timeout(self) -> int:
         """
         How long to wait to lock the database after last user interaction
         """
-        return int(self.preferences["inactivity-lock-timeout"])
+        if self._inactivity_cache is None:
+            self._inactivity_cache = int(self.preferences["inactivity-lock-timeout"])
+        return self._inactivity_cache
+
+    def invalidate_preference_cache(self, pref_id: str) -> None:
+        """
+        Forget the memoized value of the given preference
+        """
+        if pref_id == "database-path":
+            self._db_path_cache = None
+        elif pref_id == "max-results":
+            self._max_results_cache = None
+        elif pref_id == "inactivity-lock-timeout":
+            self._inactivity_cache = None
+
+    def activate_entry(
+        self, keyword: str, entry: str, prev_query_arg: str
+    ) -> BaseAction:
+        """
+        User selected an entry from the search results - remember it
+        and re-render the query as "<keyword> <entry>"
+        """
+        self.set_active_entry(keyword, entry)
+        self.set_active_entry_search_restore(entry, prev_query_arg)
+        self.add_recent_active_entry(entry)
+        return SetUserQueryAction(f"{keyword} {entry}")
+
+    def show_notification(self, summary: str) -> None:
+        """
+        Show a desktop notification
+        """
+        Notify.Notification.new(summary).show()
 
     def set_active_entry(self, keyword: str, entry: str) -> None:
         """
@@ -134,19 +186,31 @@ class KeepassxcExtension(Extension):
         Add an entry to the head of the recent active entries list.
         Make sure the entry appears in the list only once.
         """
-        if entry in self.recent_active_entries:
-            idx = self.recent_active_entries.index(entry)
-            del self.recent_active_entries[idx]
-        self.recent_active_entries = [entry] + self.recent_active_entries
         max_items = self.get_max_result_items()
-        self.recent_active_entries = self.recent_active_entries[:max_items]
+        if self.recent_active_entries.maxlen != max_items:
+            # Preferences aren't available yet when __init__ runs,
+            # so the deque gets (re)bounded here on first use.
+            # Take items from the head: that's where the newest ones
+            # are, and they are the ones to keep when max-results shrinks
+            self.recent_active_entries = deque(
+                islice(self.recent_active_entries, max_items), max_items
+            )
+            self._recent_set = set(self.recent_active_entries)
+        if entry in self._recent_set:
+            self.recent_active_entries.remove(entry)
+        elif len(self.recent_active_entries) == max_items:
+            # appendleft() is about to evict the oldest entry on the right
+            self._recent_set.discard(self.recent_active_entries[-1])
+        self._recent_set.add(entry)
+        self.recent_active_entries.appendleft(entry)
 
     def database_path_changed(self) -> None:
         """
         We are now using a different database file - do something about that.
         """
         # Shouldn't be showing recent entries from another database
-        self.recent_active_entries = []
+        self.recent_active_entries.clear()
+        self._recent_set.clear()
 
         # Active entry and old search no longer valid
         self.active_entry = None
@@ -168,7 +232,9 @@ class KeywordQueryEventListener(EventListener):
             )
 
             if self.keepassxc_db.is_passphrase_needed():
-                return render.ask_to_enter_passphrase(extension.get_db_path())
+                return render.ask_to_enter_passphrase(
+                    extension.get_db_path(), self.read_verify_passphrase
+                )
             return self.process_keyword_query(event, extension)
         except KeepassxcCliNotFoundError:
             return render.cli_not_found_error()
@@ -190,23 +256,43 @@ class KeywordQueryEventListener(EventListener):
                     query_keyword,
                     "",
                     extension.recent_active_entries,
+                    len(extension.recent_active_entries),
                     extension.get_max_result_items(),
+                    extension.activate_entry,
                 )
             return render.ask_to_enter_query()
 
         if extension.check_and_reset_active_entry(query_keyword, query_arg):
             details = self.keepassxc_db.get_entry_details(query_arg)
-            return render.active_entry(details)
+            return render.active_entry(details, extension.show_notification)
 
         prev_query_arg = extension.check_and_reset_search_restore(query_arg)
         if prev_query_arg:
-            return SetUserQueryAction("{} {}".format(query_keyword, prev_query_arg))
+            return SetUserQueryAction(f"{query_keyword} {prev_query_arg}")
 
-        entries = self.keepassxc_db.search(query_arg)
+        max_items = extension.get_max_result_items()
+        (total, entries) = self.keepassxc_db.search(query_arg, limit=max_items)
         return render.search_results(
-            query_keyword, query_arg, entries, extension.get_max_result_items()
+            query_keyword, query_arg, entries, total, max_items,
+            extension.activate_entry,
         )
 
+    def read_verify_passphrase(self) -> None:
+        """
+        Create a passphrase entry window and get the passphrase, or not
+        """
+        win = GtkPassphraseEntryWindow(
+            verify_passphrase_fn=self.keepassxc_db.verify_and_set_passphrase,
+            icon_file=_PASSPHRASE_WINDOW_ICON,
+        )
+
+        # Activate the passphrase entry window from a separate thread
+        Timer(0.5, activate_passphrase_window).start()
+
+        win.read_passphrase()
+        if not self.keepassxc_db.is_passphrase_needed():
+            Notify.Notification.new("KeePassXC database unlocked.").show()
+
 
 class ItemEnterEventListener(EventListener):
     """ KeywordQueryEventListener class used to manage user input """
@@ -214,24 +300,11 @@ class ItemEnterEventListener(EventListener):
     def __init__(self, keepassxc_db):
         self.keepassxc_db = keepassxc_db
 
-    # FUTURE replace with CallObjectMethodEventListener
-    def on_event(self, event, extension) -> BaseAction:
+    def on_event(self, event, _extension) -> BaseAction:
         try:
             data = event.get_data()
-            action = data.get("action", None)
-            if action == "read_passphrase":
-                self.read_verify_passphrase()
-                return DoNothingAction()
-            if action == "activate_entry":
-                keyword = data.get("keyword", None)
-                entry = data.get("entry", None)
-                extension.set_active_entry(keyword, entry)
-                prev_query_arg = data.get("prev_query_arg", None)
-                extension.set_active_entry_search_restore(entry, prev_query_arg)
-                extension.add_recent_active_entry(entry)
-                return SetUserQueryAction("{} {}".format(keyword, entry))
-            if action == "show_notification":
-                Notify.Notification.new(data.get("summary")).show()
+            if data.get("action") == "call_method":
+                return self._call_method(data)
         except KeepassxcCliNotFoundError:
             return render.cli_not_found_error()
         except KeepassxcFileNotFoundError:
@@ -240,23 +313,15 @@ class ItemEnterEventListener(EventListener):
             return render.keepassxc_cli_error(exc.message)
         return DoNothingAction()
 
-    def read_verify_passphrase(self) -> None:
-        """
-        Create a passphrase entry window and get the passphrase, or not
-        """
-        win = GtkPassphraseEntryWindow(
-            verify_passphrase_fn=self.keepassxc_db.verify_and_set_passphrase,
-            icon_file=os.path.join(
-                current_script_path(), "images/keepassxc-search.svg"
-            ),
-        )
-
-        # Activate the passphrase entry window from a separate thread
-        Timer(0.5, activate_passphrase_window).start()
-
-        win.read_passphrase()
-        if not self.keepassxc_db.is_passphrase_needed():
-            Notify.Notification.new("KeePassXC database unlocked.").show()
+    @staticmethod
+    def _call_method(data) -> BaseAction:
+        obj = get_callable_object(data["obj_key"])
+        if obj is None:
+            # The target object is gone - e.g. the item was rendered
+            # before the extension was restarted. Nothing to call.
+            return DoNothingAction()
+        result = getattr(obj, data["method_name"])(*data["args"])
+        return result if isinstance(result, BaseAction) else DoNothingAction()
 
 
 # pylint: disable=too-few-public-methods
@@ -268,6 +333,7 @@ class PreferencesUpdateEventListener(EventListener):
 
     def on_event(self, event, extension) -> None:
         if event.new_value != event.old_value:
+            extension.invalidate_preference_cache(event.id)
             if event.id == "database-path":
                 # REORG: only call keepassxc
                 # Pass "database_id" that will allow us to add multiple dbs
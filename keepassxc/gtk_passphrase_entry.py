@@ -1,12 +1,13 @@
 """
 Simple passphrase entry Gtk window
 """
+import threading
 from typing import Optional, Callable
 import gi
 
 gi.require_version("Gtk", "3.0")
 # pylint: disable=wrong-import-order
-from gi.repository import Gtk, Gdk  # noqa: E402
+from gi.repository import Gtk, Gdk, GLib  # noqa: E402
 
 
 class GtkPassphraseEntryWindow(Gtk.Window):
@@ -22,6 +23,7 @@ class GtkPassphraseEntryWindow(Gtk.Window):
         Gtk.Window.__init__(self, title="Enter Passphrase")
 
         self.verify_passphrase_fn = verify_passphrase_fn
+        self.verifying = False
 
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         self.add(vbox)
@@ -54,25 +56,55 @@ class GtkPassphraseEntryWindow(Gtk.Window):
     def enter_pressed(self, entry: Gtk.Entry) -> None:
         """
         When Enter pressed, verify the passphrase (if able),
-        close the window and return entered passphrase
+        close the window and return entered passphrase.
+
+        Verification runs the expensive KDBX key derivation, so it is
+        offloaded to a worker thread - otherwise the window freezes and
+        the "Verifying passphrase..." label never even paints.
         """
+        if self.verifying:
+            return
         passphrase = entry.get_text()
         if self.verify_passphrase_fn:
+            self.verifying = True
             self.show_verifying_passphrase()
-            if self.verify_passphrase_fn(passphrase):
-                self.passphrase = passphrase
-                self.close_window()
-            else:
-                self.show_incorrect_passphrase()
+            self.entry.set_sensitive(False)
+            threading.Thread(
+                target=self.verify_worker, args=(passphrase,), daemon=True
+            ).start()
         else:
             self.passphrase = passphrase
             self.close_window()
 
+    def verify_worker(self, passphrase: str) -> None:
+        """
+        Run the passphrase verification off the GTK main thread and
+        marshal the result back onto it
+        """
+        verify_fn = self.verify_passphrase_fn
+        verified = bool(verify_fn and verify_fn(passphrase))
+        GLib.idle_add(self.verify_done, verified, passphrase)
+
+    def verify_done(self, verified: bool, passphrase: str) -> bool:
+        """
+        Act on the verification result (called on the GTK main thread)
+        """
+        self.verifying = False
+        self.entry.set_sensitive(True)
+        if verified:
+            self.passphrase = passphrase
+            self.close_window()
+        else:
+            self.show_incorrect_passphrase()
+            self.entry.grab_focus()
+        # Tell GLib not to re-run this idle handler
+        return False
+
     def key_pressed(self, _, event) -> None:
         """
         When Esc pressed, close the window
         """
-        if event.hardware_keycode == 9:
+        if event.keyval == Gdk.KEY_Escape:
             self.passphrase = ""
             self.close_window()
 
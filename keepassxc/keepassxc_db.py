@@ -6,10 +6,30 @@ Features:
     - Search entries
     - Retrieve entry details (username, password, notes, URL)
 """
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import hashlib
+import shutil
 import subprocess
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from select import select
+
+# How many recent passphrase verification results to remember
+VERIFY_CACHE_MAX_SIZE = 8
+
+# How many recent search queries to keep cached along with their results
+SEARCH_CACHE_MAX_SIZE = 32
+
+# How long to wait for the interactive CLI session to answer a command
+SESSION_READ_TIMEOUT = 15.0
+
+# How long initialize() trusts its previous stat of the database file
+STAT_MIN_INTERVAL = 1.0
+
+# Entry attributes surfaced by get_entry_details
+_ENTRY_ATTRS = ("UserName", "Password", "URL", "Notes")
 
 
 class KeepassxcCliNotFoundError(Exception):
@@ -38,6 +58,141 @@ class KeepassxcCliError(Exception):
         self.message = message
 
 
+def _quote_session_arg(arg: str) -> str:
+    """
+    Quote an argument for the interactive CLI command line
+    """
+    if arg and not any(ch in arg for ch in ' "\\'):
+        return arg
+    escaped = arg.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class KeepassxcCliSession:
+    """
+    A keepassxc-cli process kept running in interactive mode
+    (`keepassxc-cli open`).
+
+    The database is unlocked once when the session is opened, so
+    subsequent commands written to the CLI's stdin are answered without
+    paying a fork/exec plus the expensive KDBX key derivation on every
+    invocation.
+    """
+
+    def __init__(self, cli: str, path: str, passphrase: str) -> None:
+        self.prompt = b""
+        self.lock = threading.Lock()
+        try:
+            self.proc = subprocess.Popen(
+                [cli, "open", "-q", path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except OSError:
+            raise KeepassxcCliNotFoundError()
+        # Popen was given PIPE for all three streams
+        assert self.proc.stdin and self.proc.stdout and self.proc.stderr
+        self.stdin = self.proc.stdin
+        self.stdout = self.proc.stdout
+        self.stderr = self.proc.stderr
+        try:
+            self.stdin.write(passphrase.encode("utf-8") + b"\n")
+            self.stdin.flush()
+        except OSError:
+            self.close()
+            raise KeepassxcCliError("Could not open interactive CLI session")
+        out = self._read_output()
+        if self.proc.poll() is not None or not out.endswith(b"> "):
+            err = self._drain_stderr()
+            self.close()
+            raise KeepassxcCliError(
+                err.decode("utf-8") or "Could not open interactive CLI session"
+            )
+        # Whatever the CLI printed last after unlocking is the prompt
+        # it will show after every command from now on
+        self.prompt = out[out.rfind(b"\n") + 1:]
+        self._drain_stderr()
+
+    def run(self, *args) -> Tuple[str, str]:
+        """
+        Run one command inside the session.
+
+        :returns: (stderr, stdout) with the same semantics as
+            `KeepassxcDatabase.run_cli`
+        :raises KeepassxcCliError: the session is unusable and should be
+            closed by the caller
+        """
+        cmd = " ".join(_quote_session_arg(arg) for arg in args)
+        with self.lock:
+            try:
+                self.stdin.write(cmd.encode("utf-8") + b"\n")
+                self.stdin.flush()
+            except OSError:
+                raise KeepassxcCliError("Interactive CLI session is closed")
+            out = self._read_output()
+            if self.proc.poll() is not None:
+                raise KeepassxcCliError("Interactive CLI session exited")
+            if not out.endswith(self.prompt):
+                raise KeepassxcCliError("Timed out waiting for CLI output")
+            out = out[: -len(self.prompt)]
+            # Error output usually lands before the prompt does; when
+            # there is no regular output at all, give it a moment extra
+            err = self._drain_stderr(0.2 if not out else 0.0)
+        return (err.decode("utf-8"), out.decode("utf-8"))
+
+    def close(self) -> None:
+        """
+        Terminate the CLI process, locking the database.
+
+        Takes the same lock as run(), so an in-flight command finishes
+        reading its output before the process goes away.
+        """
+        with self.lock:
+            if self.proc.poll() is None:
+                try:
+                    self.proc.terminate()
+                    self.proc.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    self.proc.kill()
+
+    def _read_output(self) -> bytes:
+        """
+        Read stdout until the interactive prompt shows up again
+        (or the process exits, or the read times out)
+        """
+        buf = b""
+        deadline = time.monotonic() + SESSION_READ_TIMEOUT
+        while time.monotonic() < deadline:
+            ready, _, _ = select([self.stdout], [], [], 0.05)
+            if ready:
+                chunk = os.read(self.stdout.fileno(), 4096)
+                if not chunk:
+                    break
+                buf += chunk
+            elif buf.endswith(self.prompt or b"> "):
+                break
+            elif self.proc.poll() is not None:
+                break
+        return buf
+
+    def _drain_stderr(self, timeout: float = 0.0) -> bytes:
+        """
+        Read whatever error output has accumulated without blocking
+        """
+        buf = b""
+        while True:
+            ready, _, _ = select([self.stderr], [], [], timeout)
+            if not ready:
+                break
+            timeout = 0.0
+            chunk = os.read(self.stderr.fileno(), 4096)
+            if not chunk:
+                break
+            buf += chunk
+        return buf
+
+
 class KeepassxcDatabase:
     """ Wrapper around keepassxc-cli """
 
@@ -47,8 +202,24 @@ class KeepassxcDatabase:
         self.path = None
         self.path_checked = False
         self.passphrase = None
+        # time.monotonic() deadline for the inactivity lock - immune to
+        # wall-clock adjustments (NTP jumps, suspend/resume)
         self.passphrase_expires_at = None
         self.inactivity_lock_timeout = 0
+        # Digest of (path, file mtime, passphrase) -> verification result
+        self._verify_cache: "OrderedDict[bytes, bool]" = OrderedDict()
+        # Long-lived interactive CLI session, if one could be opened
+        self._session: Optional[KeepassxcCliSession] = None
+        # (path, file mtime, lowercased query) -> matching entry names
+        self._search_cache: "OrderedDict[Tuple[str, int, str], List[str]]" = (
+            OrderedDict()
+        )
+        # Modification time of the database file, refreshed by initialize()
+        self._path_mtime_ns = 0
+        # Path argument initialize() saw last, before normalization
+        self._last_init_path = None
+        # Don't re-stat the file until this time.monotonic() deadline
+        self._next_stat_at = 0.0
 
     def initialize(self, path: str, inactivity_lock_timeout: int) -> None:
         """
@@ -65,25 +236,55 @@ class KeepassxcDatabase:
             else:
                 raise KeepassxcCliNotFoundError()
 
+        # Fast path for the keystroke-driven event stream: nothing to do
+        # when the path is unchanged and the file was stat'ed a moment
+        # ago (the cached mtime can be up to STAT_MIN_INTERVAL stale,
+        # which only delays cache invalidation by that much)
+        now = time.monotonic()
+        if path == self._last_init_path and self.path_checked:
+            if now < self._next_stat_at:
+                return
+        self._last_init_path = path
+
+        # Normalize before comparing, so "~/passwords.kdbx" and a
+        # symlink to it don't look like a database change (which would
+        # lock the database and drop the caches)
+        path = os.path.realpath(os.path.expanduser(path))
         if path != self.path:
             self.path = path
             self.path_checked = False
             self.passphrase = None
+            # The session (if any) still has the previous database open
+            self.close_session()
 
-        if not self.path_checked:
-            if os.path.exists(self.path):
-                self.path_checked = True
-            else:
-                raise KeepassxcFileNotFoundError()
+        # A single stat doubles as the existence check and the source of
+        # the file mtime that the search/verify caches key off
+        try:
+            stat_result = os.stat(self.path)
+        except OSError:
+            self.path_checked = False
+            raise KeepassxcFileNotFoundError()
+        if stat_result.st_mtime_ns != self._path_mtime_ns:
+            self._path_mtime_ns = stat_result.st_mtime_ns
+            if self._session is not None:
+                # The database was edited on disk (e.g. in the KeePassXC
+                # GUI) - the session still serves the old contents, so
+                # reopen it against the current file
+                self.open_session()
+        self.path_checked = True
+        self._next_stat_at = now + STAT_MIN_INTERVAL
 
     def change_path(self, new_path: str) -> None:
         """
         Change the path to the database file and lock the database.
         """
-        self.path = os.path.expanduser(new_path)
+        self.path = os.path.realpath(os.path.expanduser(new_path))
         self.path_checked = False
         self.passphrase = None
         self.passphrase_expires_at = None
+        self._verify_cache.clear()
+        self._search_cache.clear()
+        self.close_session()
 
     def change_inactivity_lock_timeout(self, secs: int) -> None:
         """
@@ -92,6 +293,8 @@ class KeepassxcDatabase:
         self.inactivity_lock_timeout = secs
         self.passphrase = None
         self.passphrase_expires_at = None
+        self._search_cache.clear()
+        self.close_session()
 
     def is_passphrase_needed(self):
         """
@@ -100,30 +303,139 @@ class KeepassxcDatabase:
         if self.passphrase is None:
             return True
         if self.inactivity_lock_timeout:
-            if datetime.now() > self.passphrase_expires_at:
+            if time.monotonic() > self.passphrase_expires_at:
                 self.passphrase = None
+                self.close_session()
                 return True
         return False
 
     def verify_and_set_passphrase(self, passphrase: str) -> bool:
         """
         Try to query the database using the given passphrase,
-        save the passphrase if successful
+        save the passphrase if successful.
+
+        Verification runs the full (expensive) KDBX key derivation in
+        keepassxc-cli, so recent results are cached keyed by a digest of
+        (path, file mtime, passphrase) - retyping the same passphrase
+        doesn't spawn the CLI again.
         """
-        self.passphrase = passphrase
-        err, _ = self.run_cli("ls", "-q", self.path)
-        if err:
+        cache_key = self._verify_cache_key(passphrase)
+        verified = self._verify_cache.get(cache_key)
+        if verified is None:
+            self.passphrase = passphrase
+            # Probe with a one-shot invocation on purpose: an open
+            # interactive session is already unlocked and would answer
+            # "ls" successfully no matter what passphrase was given
+            err, _ = self._run_cli_oneshot("ls", "-q", self.path)
+            verified = not err
+            self._verify_cache[cache_key] = verified
+            if len(self._verify_cache) > VERIFY_CACHE_MAX_SIZE:
+                self._verify_cache.popitem(last=False)
+        else:
+            self._verify_cache.move_to_end(cache_key)
+
+        if verified:
+            self.passphrase = passphrase
+            self._extend_passphrase_expiration()
+            if self._session is None:
+                self.open_session()
+        else:
             self.passphrase = None
-            return False
-        return True
+        return verified
 
-    def search(self, query: str) -> List[str]:
+    def open_session(self) -> None:
+        """
+        Try to start a long-lived interactive CLI session so subsequent
+        queries skip the per-invocation key derivation. Failure is fine:
+        queries simply keep spawning the CLI per call.
+        """
+        self.close_session()
+        try:
+            self._session = KeepassxcCliSession(self.cli, self.path, self.passphrase)
+        except (KeepassxcCliNotFoundError, KeepassxcCliError):
+            self._session = None
+
+    def close_session(self) -> None:
+        """
+        Terminate the interactive CLI session, if any
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _verify_cache_key(self, passphrase: str) -> bytes:
+        """
+        Cache key for a passphrase verification attempt - including the
+        file mtime makes the cached result expire when the database file
+        changes on disk
+        """
+        key_src = f"{self.path}\n{self._path_mtime_ns}\n{passphrase}"
+        return hashlib.sha256(key_src.encode("utf-8")).digest()
+
+    def search(
+        self, query: str, limit: Optional[int] = None
+    ) -> Tuple[int, List[str]]:
         """
         Search the database for entry titles that contain the given query string
+
+        Results of recent queries are cached (keyed by database path,
+        file mtime and the query), so the repeated queries Ulauncher
+        fires while the user types and edits don't re-invoke the CLI.
+        A query that extends an already-cached one is answered by
+        filtering the cached results in Python.
+
+        :param query: substring to look for in entry titles
+        :param limit: at most this many entry names are returned
+            (None means all of them)
+        :returns: (total number of matches, first `limit` matching names)
         """
         if self.is_passphrase_needed():
             raise KeepassxcLockedDbError()
 
+        query_lower = query.lower()
+        cache_key = (self.path, self._path_mtime_ns, query_lower)
+        entries = self._search_cache.get(cache_key)
+        if entries is not None:
+            self._search_cache.move_to_end(cache_key)
+        else:
+            entries = self._refine_cached_search(self._path_mtime_ns, query_lower)
+            if entries is None:
+                entries = self._run_locate(query)
+            self._search_cache[cache_key] = entries
+            if len(self._search_cache) > SEARCH_CACHE_MAX_SIZE:
+                self._search_cache.popitem(last=False)
+
+        total = len(entries)
+        if limit is not None and total > limit:
+            # Callers rendering a result page never look past `limit`
+            # entries, so don't hand over the rest
+            return (total, entries[:limit])
+        return (total, entries)
+
+    def _refine_cached_search(
+        self, mtime: int, query_lower: str
+    ) -> Optional[List[str]]:
+        """
+        Answer a query by narrowing down the cached results of a less
+        specific one: every entry matching "git" also matched "gi",
+        so the cached "gi" results can be filtered without the CLI
+        """
+        for (path, cached_mtime, cached_query), cached in reversed(
+            self._search_cache.items()
+        ):
+            if path != self.path or cached_mtime != mtime:
+                continue
+            if cached_query in query_lower:
+                # Match against the slash-prefixed entry path, the way
+                # the CLI's locate does - cached entry names had their
+                # leading "/" stripped by _run_locate
+                return [e for e in cached if query_lower in f"/{e}".lower()]
+        return None
+
+    def _run_locate(self, query: str) -> List[str]:
+        """
+        Run the CLI "locate" command and parse its output into entry names
+        """
         (err, out) = self.run_cli("locate", "-q", self.path, query)
         if err:
             if "No results for that" in err:
@@ -131,11 +443,14 @@ class KeepassxcDatabase:
             raise KeepassxcCliError(err)
         # Entry names in keepassxc-cli start with a "/"
         # (because kdbx files have a tree structure with "folders" etc)
-        # For aesthetic purposes, we are removing the leading "/" here
-        # by blindly cutting off the first char
-        # but will add it back any time we need to pass an entry name
-        # to the CLI as an argument
-        return [l[1:] for l in out.splitlines()]
+        # For aesthetic purposes, we are removing the leading "/" here -
+        # in two C-level passes over the whole output instead of one
+        # slice per line - but will add it back any time we need to pass
+        # an entry name to the CLI as an argument
+        stripped = out.replace("\n/", "\n")
+        if stripped.startswith("/"):
+            stripped = stripped[1:]
+        return stripped.splitlines()
 
     def get_entry_details(self, entry: str) -> Dict[str, str]:
         """
@@ -151,9 +466,58 @@ class KeepassxcDatabase:
         if self.is_passphrase_needed():
             raise KeepassxcLockedDbError()
 
+        # A single `show` invocation prints all attributes at once,
+        # paying the expensive KDBX key derivation only one time.
+        # Fall back to per-attribute fetching if the output cannot be
+        # parsed (e.g. older keepassxc-cli versions).
+        (err, out) = self.run_cli("show", "-s", "-q", self.path, f"/{entry}")
+        if not err:
+            attrs = self._parse_show_output(out)
+            if attrs is not None:
+                return attrs
+        return self._get_entry_details_per_attr(entry)
+
+    @staticmethod
+    def _parse_show_output(out: str) -> Optional[Dict[str, str]]:
+        """
+        Parse the "Name: value" block printed by `keepassxc-cli show`
+        into a dict of the attributes we care about.
+
+        Notes can span multiple lines, so a line that doesn't start a
+        (not yet seen) known attribute is treated as a continuation of
+        the current one.
+
+        :returns: dict of entry attributes, or None if any expected
+            attribute is missing from the output
+        """
+        known = ("Title", "UserName", "Password", "URL", "Notes", "Uuid", "Tags")
+        parsed: Dict[str, str] = {}
+        current = None
+        for line in out.splitlines():
+            for name in known:
+                if name not in parsed and line.startswith(name + ":"):
+                    value = line[len(name) + 1:]
+                    if value.startswith(" "):
+                        value = value[1:]
+                    parsed[name] = value
+                    current = name
+                    break
+            else:
+                if current is not None:
+                    parsed[current] += "\n" + line
+        if all(name in parsed for name in _ENTRY_ATTRS):
+            return {name: parsed[name] for name in _ENTRY_ATTRS}
+        return None
+
+    def _get_entry_details_per_attr(self, entry: str) -> Dict[str, str]:
+        """
+        Fetch entry attributes one CLI invocation at a time - fallback
+        for keepassxc-cli versions whose `show` output we cannot parse
+        """
         attrs = dict()
-        for attr in ["UserName", "Password", "URL", "Notes"]:
-            (err, out) = self.run_cli("show", "-q", "-a", attr, self.path, f"/{entry}")
+        entry_path = f"/{entry}"
+        for attr in _ENTRY_ATTRS:
+            (err, out) = self.run_cli("show", "-q", "-a", attr, self.path, entry_path)
             if err:
                 raise KeepassxcCliError(err)
             attrs[attr] = out.strip("\n")
@@ -161,34 +525,55 @@ class KeepassxcDatabase:
 
     def can_execute_cli(self) -> bool:
         """
-        Whether we are able to execute the KeePassXC without an OS error
+        Whether the KeePassXC CLI binary can be found and executed
         """
-        try:
-            subprocess.run(
-                [self.cli], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
-            )
-            return True
-        except OSError:
-            return False
+        return shutil.which(self.cli) is not None
 
     def run_cli(self, *args) -> Tuple[str, str]:
         """
         Execute the KeePassXC CLI with given args, parse output and handle errors
+
+        Runs the command inside the interactive CLI session when one is
+        open, falling back to a one-shot invocation otherwise (or if the
+        session died).
+        """
+        if self._session is not None:
+            # The database is already open inside the session,
+            # so the path argument is dropped from the command
+            session_args = [arg for arg in args if arg != self.path]
+            try:
+                (err, out) = self._session.run(*session_args)
+                self._extend_passphrase_expiration()
+                return (err, out)
+            except KeepassxcCliError:
+                self.close_session()
+
+        return self._run_cli_oneshot(*args)
+
+    def _run_cli_oneshot(self, *args) -> Tuple[str, str]:
+        """
+        Execute the KeePassXC CLI as a one-shot subprocess, feeding it
+        the passphrase on stdin
         """
         try:
             proc = subprocess.run(
                 [self.cli, *args],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                input=bytes(self.passphrase, "utf-8"),
+                capture_output=True,
+                encoding="utf-8",
+                input=self.passphrase,
                 check=False,
             )
         except OSError:
             raise KeepassxcCliNotFoundError()
 
-        if self.inactivity_lock_timeout:
-            self.passphrase_expires_at = datetime.now() + timedelta(
-                seconds=self.inactivity_lock_timeout
-            )
+        self._extend_passphrase_expiration()
+
+        return (proc.stderr, proc.stdout)
 
-        return (proc.stderr.decode("utf-8"), proc.stdout.decode("utf-8"))
+    def _extend_passphrase_expiration(self) -> None:
+        """
+        Push the inactivity lock deadline further out after each
+        user-triggered CLI interaction
+        """
+        if self.inactivity_lock_timeout:
+            self.passphrase_expires_at = time.monotonic() + self.inactivity_lock_timeout
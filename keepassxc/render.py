@@ -1,19 +1,21 @@
 """
 Functions that deal with rendering Ulauncher result items
 """
-from typing import List, Dict
+from itertools import islice
+from typing import Any, Collection, Dict
 from ulauncher.api.shared.item.ResultItem import ResultItem
 from ulauncher.api.shared.item.ExtensionResultItem import ExtensionResultItem
 from ulauncher.api.shared.item.ExtensionSmallResultItem import ExtensionSmallResultItem
 from ulauncher.api.shared.action.BaseAction import BaseAction
 from ulauncher.api.shared.action.RenderResultListAction import RenderResultListAction
 from ulauncher.api.shared.action.DoNothingAction import DoNothingAction
-from ulauncher.api.shared.action.ExtensionCustomAction import ExtensionCustomAction
 from ulauncher.api.shared.action.ActionList import ActionList
 
 # from ulauncher.api.shared.action.SetUserQueryAction import SetUserQueryAction
 from ulauncher.api.shared.action.CopyToClipboardAction import CopyToClipboardAction
 
+from .custom_action_utils import CallMethodAction
+
 NO_SEARCH_RESULTS_ITEM = ExtensionResultItem(
     icon="images/not_found.svg",
     name="No matching entries found...",
@@ -21,6 +23,46 @@ NO_SEARCH_RESULTS_ITEM = ExtensionResultItem(
     on_enter=DoNothingAction(),
 )
 
+# Result items and actions below never change, so they are built once
+# at import time instead of on every event
+
+CLI_NOT_FOUND_ITEM = ExtensionResultItem(
+    icon="images/error.svg",
+    name="Cannot execute keepassxc-cli",
+    description="Please make sure keepassxc-cli is installed and accessible",
+    on_enter=DoNothingAction(),
+)
+CLI_NOT_FOUND_ACTION = RenderResultListAction([CLI_NOT_FOUND_ITEM])
+
+DB_FILE_NOT_FOUND_ITEM = ExtensionResultItem(
+    icon="images/error.svg",
+    name="Cannot find the database file",
+    description="Please verify database file path in extension preferences",
+    on_enter=DoNothingAction(),
+)
+DB_FILE_NOT_FOUND_ACTION = RenderResultListAction([DB_FILE_NOT_FOUND_ITEM])
+
+ENTER_QUERY_ITEM = ExtensionResultItem(
+    icon="images/keepassxc-search.svg",
+    name="Enter search query...",
+    description="Please enter your search query",
+    on_enter=DoNothingAction(),
+)
+ENTER_QUERY_ACTION = RenderResultListAction([ENTER_QUERY_ITEM])
+
+# "Unlock database" items differ only by database path, which changes
+# very rarely - cache the prebuilt action per path
+_ASK_PASSPHRASE_CACHE: Dict[str, BaseAction] = {}
+
+# Entry attributes shown on the active entry screen:
+# (attribute name in keepassxc-cli, display name, capitalized display name)
+_ENTRY_ATTRS = (
+    ("Password", "password", "Password"),
+    ("UserName", "username", "Username"),
+    ("URL", "URL", "Url"),
+    ("Notes", "notes", "Notes"),
+)
+
 
 def item_more_results_available(cnt: int) -> ResultItem:
     """
@@ -28,9 +70,7 @@ def item_more_results_available(cnt: int) -> ResultItem:
     """
     return ExtensionSmallResultItem(
         icon="images/empty.png",
-        name="...{} more results available, please refine the search query...".format(
-            cnt
-        ),
+        name=f"...{cnt} more results available, please refine the search query...",
         on_enter=DoNothingAction(),
     )
 
@@ -40,33 +80,14 @@ def cli_not_found_error() -> BaseAction:
     Was not able to execute keepassxc-cli because it was either
     not found or wrong permissions
     """
-    return RenderResultListAction(
-        [
-            ExtensionResultItem(
-                icon="images/error.svg",
-                name="Cannot execute keepassxc-cli",
-                # pylint: disable=line-too-long
-                description="Please make sure keepassxc-cli is installed and accessible",  # noqa: E501
-                on_enter=DoNothingAction(),
-            )
-        ]
-    )
+    return CLI_NOT_FOUND_ACTION
 
 
 def db_file_not_found_error() -> BaseAction:
     """
     Database file specified in preferences could not be found
     """
-    return RenderResultListAction(
-        [
-            ExtensionResultItem(
-                icon="images/error.svg",
-                name="Cannot find the database file",
-                description="Please verify database file path in extension preferences",
-                on_enter=DoNothingAction(),
-            )
-        ]
-    )
+    return DB_FILE_NOT_FOUND_ACTION
 
 
 def keepassxc_cli_error(message: str) -> BaseAction:
@@ -85,94 +106,78 @@ def keepassxc_cli_error(message: str) -> BaseAction:
     )
 
 
-def ask_to_enter_passphrase(db_path: str) -> BaseAction:
+def ask_to_enter_passphrase(db_path: str, read_passphrase_fn: Any) -> BaseAction:
     """
     Ask user to enter the passphrase to unlock database
     """
-    return RenderResultListAction(
-        [
-            ExtensionResultItem(
-                icon="images/keepassxc-search-locked.svg",
-                name="Unlock KeePassXC database",
-                description=db_path,
-                # FUTURE replace with call_object_method
-                on_enter=ExtensionCustomAction({"action": "read_passphrase"}),
-            )
-        ]
-    )
+    action = _ASK_PASSPHRASE_CACHE.get(db_path)
+    if action is None:
+        action = RenderResultListAction(
+            [
+                ExtensionResultItem(
+                    icon="images/keepassxc-search-locked.svg",
+                    name="Unlock KeePassXC database",
+                    description=db_path,
+                    on_enter=CallMethodAction(read_passphrase_fn),
+                )
+            ]
+        )
+        _ASK_PASSPHRASE_CACHE[db_path] = action
+    return action
 
 
 def ask_to_enter_query() -> BaseAction:
     """
     Ask user to start entering the search query
     """
-    return RenderResultListAction(
-        [
-            ExtensionResultItem(
-                icon="images/keepassxc-search.svg",
-                name="Enter search query...",
-                description="Please enter your search query",
-                on_enter=DoNothingAction(),
-            )
-        ]
-    )
+    return ENTER_QUERY_ACTION
 
 
 def search_results(
-    keyword: str, arg: str, entries: List[str], max_items: int
+    keyword: str,
+    arg: str,
+    entries: Collection[str],
+    total: int,
+    max_items: int,
+    activate_entry_fn: Any,
 ) -> BaseAction:
     """
     Build list of result items `max_items` long
+
+    :param total: total number of matches, which can exceed the number
+        of entries actually handed over for rendering
     """
-    items = []
     if not entries:
-        items.append(NO_SEARCH_RESULTS_ITEM)
+        items = [NO_SEARCH_RESULTS_ITEM]
     else:
-        for entry in entries[:max_items]:
-            # FUTURE replace with call_object_method
-            action = ExtensionCustomAction(
-                {
-                    "action": "activate_entry",
-                    "entry": entry,
-                    "keyword": keyword,
-                    "prev_query_arg": arg,
-                },
-                keep_app_open=True,
+        items = [
+            ExtensionSmallResultItem(
+                icon="images/key.svg",
+                name=entry,
+                on_enter=CallMethodAction(
+                    activate_entry_fn, keyword, entry, arg, keep_app_open=True
+                ),
             )
-            items.append(
-                ExtensionSmallResultItem(
-                    icon="images/key.svg", name=entry, on_enter=action
-                )
-            )
-        if len(entries) > max_items:
-            items.append(item_more_results_available(len(entries) - max_items))
+            for entry in islice(entries, max_items)
+        ]
+        if total > max_items:
+            items.append(item_more_results_available(total - max_items))
     return RenderResultListAction(items)
 
 
-def active_entry(details: Dict[str, str]) -> BaseAction:
+def active_entry(details: Dict[str, str], show_notification_fn: Any) -> BaseAction:
     """
     Show details of an entry and allow various items to be copied to the clipboard
     """
-    attrs = [
-        ("Password", "password"),
-        ("UserName", "username"),
-        ("URL", "URL"),
-        ("Notes", "notes"),
-    ]
     items = []
-    for attr, attr_nice in attrs:
+    for attr, attr_nice, attr_cap in _ENTRY_ATTRS:
         val = details.get(attr, "")
         if val:
             action = ActionList(
                 [
-                    # FUTURE replace with call_object_method
-                    ExtensionCustomAction(
-                        {
-                            "action": "show_notification",
-                            "summary": "{} copied to the clipboard.".format(
-                                attr_nice.capitalize()
-                            ),
-                        }
+                    CallMethodAction(
+                        show_notification_fn,
+                        f"{attr_cap} copied to the clipboard.",
                     ),
                     CopyToClipboardAction(val),
                 ]
@@ -190,8 +195,8 @@ def active_entry(details: Dict[str, str]) -> BaseAction:
                 items.append(
                     ExtensionResultItem(
                         icon="images/copy.svg",
-                        name="{}: {}".format(attr_nice.capitalize(), val),
-                        description="Copy {} to the clipboard".format(attr_nice),
+                        name=f"{attr_cap}: {val}",
+                        description=f"Copy {attr_nice} to the clipboard",
                         on_enter=action,
                     )
                 )
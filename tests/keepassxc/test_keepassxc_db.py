@@ -45,17 +45,26 @@ def test_search_locked_db(test_db):
 
 def test_search_no_results(test_db):
     test_db.verify_and_set_passphrase("right passphrase")
-    assert not test_db.search("none of this, you see")
+    (total, res) = test_db.search("none of this, you see")
+    assert total == 0
+    assert not res
 
 
 def test_search(test_db):
     test_db.verify_and_set_passphrase("right passphrase")
-    res = test_db.search("onlinesite")
-    assert len(res) == 2
+    (total, res) = test_db.search("onlinesite")
+    assert total == 2
     assert "onlinesite personal" in res
     assert "onlinesite work" in res
 
 
+def test_search_limit(test_db):
+    test_db.verify_and_set_passphrase("right passphrase")
+    (total, res) = test_db.search("onlinesite", limit=1)
+    assert total == 2
+    assert len(res) == 1
+
+
 def test_get_entry_details_locked_db(test_db):
     with pytest.raises(kpdb.KeepassxcLockedDbError):
         test_db.get_entry_details("onlinesite personal")
@@ -81,3 +90,27 @@ def test_lock_unlock_after_path_change(test_db):
     # unlock 2
     test_db.verify_and_set_passphrase("right passphrase2")
     assert not test_db.is_passphrase_needed()
+
+
+def test_parse_show_output():
+    out = (
+        "Title: onlinesite personal\n"
+        "UserName: username\n"
+        "Password: password\n"
+        "URL: url\n"
+        "Notes: line1\n"
+        "line2\n"
+        "Uuid: {00000000-0000-0000-0000-000000000000}\n"
+        "Tags: \n"
+    )
+    details = kpdb.KeepassxcDatabase._parse_show_output(out)
+    assert details == {
+        "UserName": "username",
+        "Password": "password",
+        "URL": "url",
+        "Notes": "line1\nline2",
+    }
+
+
+def test_parse_show_output_missing_attrs():
+    assert kpdb.KeepassxcDatabase._parse_show_output("Title: no attrs") is None